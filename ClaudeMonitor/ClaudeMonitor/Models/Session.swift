@@ -14,6 +14,10 @@ struct Session: Codable, Identifiable {
     let startedAt: String
     let lastUpdated: String
     let subagents: [Subagent]
+    /// The file's modification date, set by SessionStore. Hooks only touch
+    /// the file for non-permission notifications, so it can be newer than
+    /// `lastUpdated`.
+    var fileModifiedDate: Date?
 
     var id: String { sessionId }
 
@@ -26,7 +30,10 @@ struct Session: Codable, Identifiable {
     }
 
     var lastUpdatedDate: Date? {
-        ISO8601DateFormatter.flexible.date(from: lastUpdated)
+        let recorded = ISO8601DateFormatter.flexible.date(from: lastUpdated)
+        guard let modified = fileModifiedDate else { return recorded }
+        guard let recorded else { return modified }
+        return max(recorded, modified)
     }
 
     var duration: TimeInterval? {
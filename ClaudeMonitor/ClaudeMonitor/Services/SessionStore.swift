@@ -113,9 +113,10 @@ final class SessionStore {
         var loaded: [Session] = []
         for file in jsonFiles {
             guard let data = try? Data(contentsOf: file),
-                  let session = try? decoder.decode(Session.self, from: data) else {
+                  var session = try? decoder.decode(Session.self, from: data) else {
                 continue
             }
+            session.fileModifiedDate = (try? file.resourceValues(forKeys: [.contentModificationDateKey]))?.contentModificationDate
 
             // Skip stale sessions
             if let updated = session.lastUpdatedDate,
@@ -129,7 +130,7 @@ final class SessionStore {
         // Sort: active first, then by lastUpdated descending
         loaded.sort { a, b in
             if a.isActive != b.isActive { return a.isActive }
-            return a.lastUpdated > b.lastUpdated
+            return (a.lastUpdatedDate ?? .distantPast) > (b.lastUpdatedDate ?? .distantPast)
         }
 
         // Detect transitions (skip on first load to avoid false positives)
@@ -0,0 +1,36 @@
+"""JSON encode/decode helpers, using orjson when it is installed.
+
+Both ``loads`` and ``dumps`` work on UTF-8 bytes so callers can read and
+write files in binary mode. Decode errors raise ``JSONDecodeError`` in
+either case (orjson's error subclasses the stdlib one).
+"""
+
+from __future__ import annotations
+
+import json
+from json import JSONDecodeError
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on installed extras
+    orjson = None
+
+__all__ = ["JSONDecodeError", "dumps", "loads"]
+
+
+if orjson is not None:
+
+    def loads(data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+else:
+
+    def loads(data: bytes | str) -> Any:
+        return json.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
@@ -1,17 +1,24 @@
 """Hook handler for Claude Code events.
 
 Reads JSON from stdin and writes session state files.
+
+This runs as a fresh process for every Claude Code event, so module-level
+imports are kept to the minimum needed to read stdin; claude_monitor.state
+is imported only once there is an event to apply.
 """
 
 from __future__ import annotations
 
-import json
-import re
+import functools
+import os
 import sys
-from datetime import datetime, timezone
-from pathlib import Path
+import time
+from typing import TYPE_CHECKING
+
+from claude_monitor import _json as json
 
-from claude_monitor.state import SessionState, SubagentState, remove_session, write_session
+if TYPE_CHECKING:
+    from claude_monitor.state import SessionState
 
 # Tools that wait for user input (not tool permissions)
 _USER_INPUT_TOOLS = {"ExitPlanMode", "AskUserQuestion"}
@@ -29,14 +36,13 @@ EVENT_STATE_MAP = {
 }
 
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
+@functools.lru_cache(maxsize=256)
 def _project_name(cwd: str) -> str:
     """Extract project name from git root, falling back to cwd basename."""
     if not cwd:
         return ""
+    from pathlib import Path
+
     p = Path(cwd)
     # Walk up to find git root
     for d in [p, *p.parents]:
@@ -47,27 +53,86 @@ def _project_name(cwd: str) -> str:
     return p.name
 
 
-_IDE_TAG_RE = re.compile(r"<ide_\w+>.*?</ide_\w+>", re.DOTALL)
-_SYSTEM_TAG_RE = re.compile(r"<system-reminder>.*?</system-reminder>", re.DOTALL)
+_SYSTEM_OPEN = "<system-reminder>"
+_SYSTEM_CLOSE = "</system-reminder>"
+
+
+def _ide_tag_end(text: str, i: int) -> int:
+    """If text[i:] starts with an ``ide_<word>>`` tag name, return the index after '>', else -1."""
+    if not text.startswith("ide_", i):
+        return -1
+    j = i + 4
+    n = len(text)
+    while j < n and (text[j].isalnum() or text[j] == "_"):
+        j += 1
+    if j == i + 4 or j >= n or text[j] != ">":
+        return -1
+    return j + 1
+
+
+def _strip_ide_tags(text: str) -> str:
+    """Remove ``<ide_*>...</ide_*>`` blocks, each ending at the nearest closing tag."""
+    out: list[str] = []
+    i = 0
+    while (j := text.find("<ide_", i)) != -1:
+        end = -1
+        body = _ide_tag_end(text, j + 1)
+        if body != -1:
+            close = text.find("</ide_", body)
+            while close != -1 and end == -1:
+                end = _ide_tag_end(text, close + 2)
+                close = text.find("</ide_", close + 1)
+        if end == -1:
+            out.append(text[i : j + 1])
+            i = j + 1
+        else:
+            out.append(text[i:j])
+            i = end
+    out.append(text[i:])
+    return "".join(out)
+
+
+def _strip_system_reminders(text: str) -> str:
+    """Remove ``<system-reminder>...</system-reminder>`` blocks."""
+    out: list[str] = []
+    i = 0
+    while (j := text.find(_SYSTEM_OPEN, i)) != -1:
+        close = text.find(_SYSTEM_CLOSE, j + len(_SYSTEM_OPEN))
+        if close == -1:
+            break
+        out.append(text[i:j])
+        i = close + len(_SYSTEM_CLOSE)
+    out.append(text[i:])
+    return "".join(out)
 
 
 def _clean_prompt(text: str) -> str:
-    """Strip IDE context tags and system reminders from a prompt."""
-    text = _IDE_TAG_RE.sub("", text)
-    text = _SYSTEM_TAG_RE.sub("", text)
+    """Strip IDE context tags and system reminders from a prompt.
+
+    Uses plain str.find scans instead of regexes; prompts without tags
+    cost two substring searches.
+    """
+    if "<ide_" in text:
+        text = _strip_ide_tags(text)
+    if _SYSTEM_OPEN in text:
+        text = _strip_system_reminders(text)
     return text.strip()
 
 
+# Only lines containing one of these can be user messages; everything else
+# is skipped without being decoded.
+_USER_TYPE_MARKERS = (b'"type":"user"', b'"type": "user"')
+
+
 def _read_topic_from_transcript(transcript_path: str) -> str:
     """Read the first user message from a transcript JSONL file."""
     if not transcript_path:
         return ""
     try:
-        p = Path(transcript_path)
-        if not p.exists():
-            return ""
-        with open(p) as f:
+        with open(transcript_path, "rb") as f:
             for line in f:
+                if not any(m in line for m in _USER_TYPE_MARKERS):
+                    continue
                 try:
                     obj = json.loads(line)
                     if obj.get("type") == "user":
@@ -83,71 +148,123 @@ def _read_topic_from_transcript(transcript_path: str) -> str:
     return ""
 
 
-def _handle_subagent(session_id: str, event: str, data: dict) -> None:
-    """Handle SubagentStart/SubagentStop by updating the session's subagent list."""
-    from claude_monitor.state import _session_path
-
-    agent_id = data.get("agent_id", "")
-    agent_type = data.get("agent_type", "")
-    now = _now_iso()
+def _load_existing(session_id: str) -> dict | None:
+    """Read and parse the session file once.
 
-    path = _session_path(session_id)
-    if not path.exists():
-        return
+    Returns None if the file is missing or unreadable.
+    """
+    from claude_monitor.state import _session_path
 
     try:
-        existing = json.loads(path.read_text())
+        existing = json.loads(_session_path(session_id).read_bytes())
     except (json.JSONDecodeError, OSError):
-        return
+        return None
+    if not isinstance(existing, dict):
+        return None
+    return existing
+
+
+def _merge_subagent(
+    subagents: list[dict], event: str, agent_id: str, agent_type: str, now_ts: float
+) -> list[dict] | None:
+    """Apply SubagentStart/SubagentStop to a subagent list in one pass.
+
+    Returns a new list (the input is not modified), or None if the event
+    changes nothing: a repeated start or a stop for an unknown agent.
+    """
+    for i, sa in enumerate(subagents):
+        if sa.get("agent_id") == agent_id:
+            if event == "SubagentStop":
+                return subagents[:i] + subagents[i + 1:]
+            return None
+    if event == "SubagentStart":
+        from claude_monitor.state import iso_from_ts
 
-    subagents: list[dict] = existing.get("subagents", [])
+        return [*subagents, {
+            "agent_id": agent_id,
+            "agent_type": agent_type,
+            "status": "running",
+            "last_updated": iso_from_ts(now_ts),
+            "last_updated_ts": now_ts,
+        }]
+    return None
 
-    if event == "SubagentStart":
-        # Add new subagent (avoid duplicates)
-        if not any(sa.get("agent_id") == agent_id for sa in subagents):
-            subagents.append({
-                "agent_id": agent_id,
-                "agent_type": agent_type,
-                "status": "running",
-                "last_updated": now,
-            })
-    elif event == "SubagentStop":
-        # Remove completed subagent
-        subagents = [sa for sa in subagents if sa.get("agent_id") != agent_id]
-
-    existing["subagents"] = subagents
-    existing["last_updated"] = now
-
-    status = existing.get("status", "STARTING")
-    # If launching a subagent, Claude is actively working — PERMISSION is stale
-    # (race: SubagentStart read the file before PostToolUse wrote THINKING)
-    if event == "SubagentStart" and status == "PERMISSION":
-        status = "THINKING"
 
-    state = SessionState(
+def _state_from_existing(
+    session_id: str, existing: dict, last_updated: str, last_updated_ts: float
+) -> SessionState:
+    """Rebuild a SessionState from a parsed session file, with a new last_updated.
+
+    Subagents are left empty; callers pass the raw list to write_session().
+    """
+    from claude_monitor.state import SessionState, record_ts
+
+    return SessionState(
         session_id=existing.get("session_id", session_id),
         cwd=existing.get("cwd", ""),
         project=existing.get("project", ""),
-        status=status,
+        status=existing.get("status", "STARTING"),
         tool_name=existing.get("tool_name"),
         permission_mode=existing.get("permission_mode", ""),
         model=existing.get("model", ""),
         topic=existing.get("topic", ""),
+        topic_scanned=existing.get("topic_scanned", False),
         last_prompt=existing.get("last_prompt", ""),
         tool_count=existing.get("tool_count", 0),
-        started_at=existing.get("started_at", now),
-        last_updated=now,
-        subagents=[
-            SubagentState(
-                agent_id=sa.get("agent_id", ""),
-                agent_type=sa.get("agent_type", ""),
-                status=sa.get("status", "running"),
-                last_updated=sa.get("last_updated", ""),
-            )
-            for sa in subagents
-        ],
+        started_at=existing.get("started_at", last_updated),
+        last_updated=last_updated,
+        started_at_ts=record_ts(existing, "started_at") or last_updated_ts,
+        last_updated_ts=last_updated_ts,
+        last_prompt_ts=existing.get("last_prompt_ts", 0.0),
     )
-    write_session(state)
+
+
+def _handle_subagent(session_id: str, event: str, data: dict, now_ts: float) -> None:
+    """Handle SubagentStart/SubagentStop by updating the session's subagent list."""
+    from claude_monitor.state import iso_from_ts, record_ts, write_session
+
+    existing = _load_existing(session_id)
+    if existing is None:
+        return
+
+    existing_status = existing.get("status", "STARTING")
+    existing_ts = record_ts(existing, "last_updated")
+    # An event timestamped after this one already went through (typically the
+    # Task tool's PostToolUse racing SubagentStop). Its status stands, but the
+    # subagent change is still applied, under the existing timestamp.
+    stale = existing_ts > now_ts
+    # ...except a start that predates Stop: Stop already cleared the list,
+    # and re-adding the subagent would leave it "running" indefinitely.
+    if stale and event == "SubagentStart" and existing_status == "WAITING":
+        return
+
+    existing_subagents = [
+        sa for sa in existing.get("subagents", []) if isinstance(sa, dict)
+    ]
+    subagents = _merge_subagent(
+        existing_subagents, event, data.get("agent_id", ""), data.get("agent_type", ""), now_ts
+    )
+
+    status = existing_status
+    # If launching a subagent, Claude is actively working — PERMISSION is stale
+    # (race: SubagentStart read the file before PostToolUse wrote THINKING)
+    if event == "SubagentStart" and status == "PERMISSION" and not stale:
+        status = "THINKING"
+
+    if subagents is None:
+        # Subagent list unchanged — only worth a write if the status changed
+        if status == existing_status:
+            return
+        subagents = existing_subagents
+
+    if stale:
+        state = _state_from_existing(
+            session_id, existing, existing.get("last_updated", ""), existing_ts
+        )
+    else:
+        state = _state_from_existing(session_id, existing, iso_from_ts(now_ts), now_ts)
+    state.status = status
+    write_session(state, existing, raw_subagents=subagents)
 
 
 def handle_hook(data: dict) -> None:
@@ -163,12 +280,19 @@ def handle_hook(data: dict) -> None:
     if event == "PreToolUse" and data.get("tool_name") in _USER_INPUT_TOOLS:
         new_status = "PERMISSION"
 
+    from claude_monitor.state import remove_session, session_lock
+
     if event == "SessionEnd":
-        remove_session(session_id)
+        with session_lock(session_id):
+            remove_session(session_id)
         return
 
+    # Timestamp the event on arrival, before possibly waiting for the lock
+    now_ts = time.time()
+
     if event in ("SubagentStart", "SubagentStop"):
-        _handle_subagent(session_id, event, data)
+        with session_lock(session_id):
+            _handle_subagent(session_id, event, data, now_ts)
         return
 
     # Notification with permission_prompt → PERMISSION state
@@ -182,45 +306,115 @@ def handle_hook(data: dict) -> None:
     if new_status is None and event not in ("Notification",):
         return
 
+    # Hold the session lock across read → merge → write so concurrent
+    # (async) hooks for the same session can't interleave and lose updates.
+    with session_lock(session_id):
+        # Other notifications carry no state: bumping the file's mtime is
+        # enough to keep the session alive, without reading or rewriting it.
+        if new_status is None and _touch_session(session_id):
+            return
+        _update_session(session_id, event, new_status, data, now_ts)
+
+
+def _touch_session(session_id: str) -> bool:
+    """Bump the session file's mtime. Returns False if there is no file yet."""
+    from claude_monitor.state import _session_path
+
+    try:
+        os.utime(_session_path(session_id))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _apply_stale_event(
+    session_id: str, event: str, data: dict, existing: dict, now_ts: float
+) -> None:
+    """Fold an event that lost the race for the lock into the newer state on disk.
+
+    Status and the other base fields already reflect the newer event; only
+    what this event adds regardless of order is kept: the tool count, and a
+    submitted prompt if it is newer than the stored one (last_prompt_ts) —
+    the newer event may be this prompt's own PreToolUse.
+    """
+    from claude_monitor.state import record_ts, write_session
+
+    state = _state_from_existing(
+        session_id, existing, existing.get("last_updated", ""), record_ts(existing, "last_updated")
+    )
+    if event == "PostToolUse":
+        state.tool_count += 1
+    elif (
+        event == "UserPromptSubmit" and data.get("prompt") and now_ts > state.last_prompt_ts
+    ):
+        state.last_prompt = data["prompt"]
+        state.last_prompt_ts = now_ts
+        cleaned = _clean_prompt(data["prompt"])
+        if cleaned:
+            state.topic = cleaned
+    else:
+        return
+
+    subagents = [sa for sa in existing.get("subagents", []) if isinstance(sa, dict)]
+    write_session(state, existing, raw_subagents=subagents)
+
+
+def _update_session(
+    session_id: str, event: str, new_status: str | None, data: dict, now_ts: float
+) -> None:
+    """Merge a state-changing event into the session file. Caller holds the lock."""
+    from claude_monitor.state import (
+        SessionState,
+        iso_from_ts,
+        record_ts,
+        write_session,
+    )
+
+    now = iso_from_ts(now_ts)
     cwd = data.get("cwd", "")
     tool_name = data.get("tool_name") if event in ("PreToolUse", "PermissionRequest") else None
     permission_mode = data.get("permission_mode", "")
-    now = _now_iso()
 
-    # Try to read existing state to preserve fields
-    from claude_monitor.state import _session_path
+    # Read existing state once to preserve fields (and for anti-regression)
+    existing = _load_existing(session_id)
+
+    # An event timestamped after this one already went through: merge only
+    # this event's delta rather than dropping it (see _apply_stale_event).
+    if existing is not None and record_ts(existing, "last_updated") > now_ts:
+        _apply_stale_event(session_id, event, data, existing, now_ts)
+        return
 
     existing_status = "STARTING"
     existing_started = now
+    existing_started_ts = now_ts
     existing_tool = None
     existing_model = ""
     existing_topic = ""
+    existing_topic_scanned = False
     existing_prompt = ""
+    existing_prompt_ts = 0.0
     existing_tool_count = 0
-    existing_subagents: list[SubagentState] = []
-    path = _session_path(session_id)
-    if path.exists():
-        try:
-            existing = json.loads(path.read_text())
-            existing_status = existing.get("status", "STARTING")
-            existing_started = existing.get("started_at", now)
-            existing_tool = existing.get("tool_name")
-            existing_model = existing.get("model", "")
-            existing_topic = existing.get("topic", "")
-            existing_prompt = existing.get("last_prompt", "")
-            existing_tool_count = existing.get("tool_count", 0)
-            existing_subagents = [
-                SubagentState(
-                    agent_id=sa.get("agent_id", ""),
-                    agent_type=sa.get("agent_type", ""),
-                    status=sa.get("status", "running"),
-                    last_updated=sa.get("last_updated", ""),
-                )
-                for sa in existing.get("subagents", [])
-                if isinstance(sa, dict)
-            ]
-        except (json.JSONDecodeError, OSError):
-            pass
+    existing_cwd = ""
+    existing_project = ""
+    existing_subagents: list[dict] = []
+    if existing is not None:
+        existing_status = existing.get("status", "STARTING")
+        existing_started = existing.get("started_at", now)
+        existing_started_ts = record_ts(existing, "started_at") or now_ts
+        existing_tool = existing.get("tool_name")
+        existing_model = existing.get("model", "")
+        existing_topic = existing.get("topic", "")
+        existing_topic_scanned = existing.get("topic_scanned", False)
+        existing_prompt = existing.get("last_prompt", "")
+        existing_prompt_ts = existing.get("last_prompt_ts", 0.0)
+        existing_tool_count = existing.get("tool_count", 0)
+        existing_cwd = existing.get("cwd", "")
+        existing_project = existing.get("project", "")
+        # Kept as the raw dicts: they are written back unchanged, so there is
+        # no point building SubagentState objects just to serialize them.
+        existing_subagents = [
+            sa for sa in existing.get("subagents", []) if isinstance(sa, dict)
+        ]
 
     # Prevent PERMISSION-setting events from regressing state (async race).
     # Since hooks run with "async": True, a delayed PermissionRequest can
@@ -243,17 +437,34 @@ def handle_hook(data: dict) -> None:
     # Extract model from SessionStart
     model = data.get("model", "") if event == "SessionStart" else existing_model
 
-    # Extract last prompt from UserPromptSubmit
-    last_prompt = data.get("prompt", "") if event == "UserPromptSubmit" else existing_prompt
+    # The git root of a cwd doesn't change within a session, and each hook
+    # runs in a fresh process — reuse the stored project instead of walking
+    # the directory tree again.
+    if cwd and cwd == existing_cwd and existing_project:
+        project = existing_project
+    else:
+        project = _project_name(cwd)
 
-    # Extract topic: always update to latest user prompt, clean IDE tags
+    # Extract last prompt from UserPromptSubmit
+    if event == "UserPromptSubmit":
+        last_prompt = data.get("prompt", "")
+        last_prompt_ts = now_ts
+    else:
+        last_prompt = existing_prompt
+        last_prompt_ts = existing_prompt_ts
+
+    # Extract topic: always update to latest user prompt, clean IDE tags.
+    # Otherwise fall back to the transcript, but only once per session (even
+    # on a miss) so later events don't rescan it.
     topic = existing_topic
+    topic_scanned = existing_topic_scanned
     if event == "UserPromptSubmit" and data.get("prompt"):
         cleaned = _clean_prompt(data["prompt"])
         if cleaned:
             topic = cleaned
-    elif not topic:
+    elif not topic and not topic_scanned:
         topic = _read_topic_from_transcript(data.get("transcript_path", ""))
+        topic_scanned = True
 
     # Increment tool count on PostToolUse
     tool_count = existing_tool_count
@@ -266,32 +477,39 @@ def handle_hook(data: dict) -> None:
     state = SessionState(
         session_id=session_id,
         cwd=cwd or "",
-        project=_project_name(cwd),
+        project=project,
         status=status,
         tool_name=tool_name,
         permission_mode=permission_mode,
         model=model,
         topic=topic,
+        topic_scanned=topic_scanned,
         last_prompt=last_prompt,
         tool_count=tool_count,
         started_at=existing_started,
         last_updated=now,
-        subagents=subagents,
+        started_at_ts=existing_started_ts,
+        last_updated_ts=now_ts,
+        last_prompt_ts=last_prompt_ts,
     )
 
-    write_session(state)
+    write_session(state, existing, raw_subagents=subagents)
 
 
 def main() -> None:
-    """Entry point: read JSON from stdin and process."""
+    """Entry point: read JSON from stdin, process it, and exit the process.
+
+    Exits via os._exit to skip interpreter teardown (atexit, finalizers,
+    module GC), which costs more than the hook's actual work. Everything
+    the hook writes goes through os.replace, so there is nothing to flush.
+    """
     try:
-        raw = sys.stdin.read()
-        if not raw.strip():
-            return
-        data = json.loads(raw)
-        handle_hook(data)
+        raw = sys.stdin.buffer.read()
+        if raw.strip():
+            handle_hook(json.loads(raw))
     except Exception:
         pass
+    os._exit(0)
 
 
 if __name__ == "__main__":
@@ -26,40 +26,49 @@ HOOK_EVENTS = [
 USAGE_HOOK_EVENTS = ["Stop", "UserPromptSubmit"]
 
 HOOK_MARKER = "claude-monitor"
+# Set on every hook handler we install, so uninstall doesn't depend on the
+# command path.
+HOOK_MARKER_KEY = "_claude_monitor"
 
 
 def _is_our_hook(h: dict) -> bool:
     """Check if a hook entry belongs to claude-monitor (flat or nested format)."""
     if not isinstance(h, dict):
         return False
+    if h.get(HOOK_MARKER_KEY):
+        return True
+    subs = [sub for sub in h.get("hooks", []) if isinstance(sub, dict)]
+    if any(sub.get(HOOK_MARKER_KEY) for sub in subs):
+        return True
+    # Installs from before HOOK_MARKER_KEY: match on the command string.
     # Flat format: {"type": "command", "command": "...claude-monitor..."}
     if HOOK_MARKER in h.get("command", ""):
         return True
     # Nested format: {"hooks": [{"command": "...claude-monitor..."}], "matcher": "..."}
-    for sub in h.get("hooks", []):
-        if isinstance(sub, dict) and HOOK_MARKER in sub.get("command", ""):
+    for sub in subs:
+        if HOOK_MARKER in sub.get("command", ""):
             return True
     return False
 
 
-def _get_hook_command() -> str:
-    """Get the hook command that invokes our handler using absolute path."""
+def _resolve_executable() -> str:
+    """Absolute path of the claude-monitor executable, or the bare name if not on PATH."""
     import shutil
 
-    cmd = shutil.which("claude-monitor")
-    if cmd:
-        return f"{cmd} hook"
-    return "claude-monitor hook"
+    return shutil.which("claude-monitor") or "claude-monitor"
 
 
-def _get_usage_hook_command() -> str:
-    """Get the hook command that fetches usage data."""
-    import shutil
+def _hook_command(exe: str) -> str:
+    """Command for the per-event hook.
 
-    cmd = shutil.which("claude-monitor")
-    if cmd:
-        return f"{cmd} usage-hook"
-    return "claude-monitor usage-hook"
+    Prefers the claude-monitor-hook script installed next to exe, which calls
+    claude_monitor.hook:main directly without importing click or the CLI.
+    """
+    if Path(exe).is_absolute():
+        hook_exe = Path(exe).with_name("claude-monitor-hook")
+        if hook_exe.exists():
+            return str(hook_exe)
+    return f"{exe} hook"
 
 
 def _build_hooks_config() -> dict:
@@ -68,8 +77,9 @@ def _build_hooks_config() -> dict:
     Uses the nested format with matcher, matching the internal Claude Code
     hook structure: each entry has a "hooks" array and a "matcher" pattern.
     """
-    command = _get_hook_command()
-    usage_command = _get_usage_hook_command()
+    exe = _resolve_executable()
+    command = _hook_command(exe)
+    usage_command = f"{exe} usage-hook"
     hooks: dict[str, list[dict]] = {}
 
     for event in HOOK_EVENTS:
@@ -78,6 +88,7 @@ def _build_hooks_config() -> dict:
                 "type": "command",
                 "command": command,
                 "async": True,
+                HOOK_MARKER_KEY: True,
             }
         ]
         # Add usage fetch hook on Stop and UserPromptSubmit
@@ -86,6 +97,7 @@ def _build_hooks_config() -> dict:
                 "type": "command",
                 "command": usage_command,
                 "async": True,
+                HOOK_MARKER_KEY: True,
             })
 
         hooks[event] = [
@@ -187,9 +199,26 @@ def hook() -> None:
 @cli.command("usage-hook")
 def usage_hook() -> None:
     """Fetch usage data from Claude API and write to monitor dir (internal use)."""
-    from claude_monitor.usage import fetch_and_write_usage
+    from claude_monitor.usage import fetch_and_write_usage, request_fetch
 
+    # Hand off to the daemon if one is running, else fetch in-process
+    if request_fetch():
+        return
     try:
         fetch_and_write_usage()
     except Exception:
         pass
+
+
+@cli.command()
+def daemon() -> None:
+    """Run the usage daemon, which keeps one HTTPS connection to the API open."""
+    from claude_monitor.usage import SOCKET_PATH, UsageDaemon
+
+    click.echo(f"Listening on {SOCKET_PATH}")
+    try:
+        UsageDaemon().serve_forever()
+    except RuntimeError as e:
+        raise click.ClickException(str(e)) from e
+    except KeyboardInterrupt:
+        pass
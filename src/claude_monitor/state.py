@@ -2,27 +2,34 @@
 
 from __future__ import annotations
 
-import json
+import fcntl
 import os
-import tempfile
 import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 
+from claude_monitor import _json as json
+
 MONITOR_DIR = Path.home() / ".claude" / "monitor" / "sessions"
+# Session file schema. 2 adds *_ts epoch fields next to the ISO timestamps,
+# which are kept for humans and the macOS app.
+FORMAT_VERSION = 2
 ZOMBIE_THRESHOLD_HOURS = 24
 
 
-@dataclass
+@dataclass(slots=True)
 class SubagentState:
     agent_id: str
     agent_type: str = ""
     status: str = "running"
     last_updated: str = ""
+    last_updated_ts: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionState:
     session_id: str
     cwd: str = ""
@@ -32,22 +39,41 @@ class SessionState:
     permission_mode: str = ""
     model: str = ""
     topic: str = ""
+    # Set once the transcript has been searched for a topic, hit or miss
+    topic_scanned: bool = False
     last_prompt: str = ""
     tool_count: int = 0
     started_at: str = ""
     last_updated: str = ""
+    started_at_ts: float = 0.0
+    last_updated_ts: float = 0.0
+    # When last_prompt was submitted; orders a late UserPromptSubmit
+    last_prompt_ts: float = 0.0
     subagents: list[SubagentState] = field(default_factory=list)
 
     @property
     def is_active(self) -> bool:
         return self.status not in ("ENDED",)
 
-    @property
-    def last_updated_dt(self) -> datetime:
-        try:
-            return datetime.fromisoformat(self.last_updated)
-        except (ValueError, TypeError):
-            return datetime.min.replace(tzinfo=timezone.utc)
+
+def iso_from_ts(ts: float) -> str:
+    """Format an epoch timestamp as a UTC ISO string."""
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def record_ts(record: dict, key: str) -> float:
+    """Return record[key + "_ts"], falling back to parsing the ISO record[key].
+
+    The fallback covers files written before FORMAT_VERSION 2. Returns 0.0
+    if neither is usable.
+    """
+    ts = record.get(f"{key}_ts")
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    try:
+        return datetime.fromisoformat(record.get(key, "")).timestamp()
+    except (ValueError, TypeError):
+        return 0.0
 
 
 def _ensure_dir() -> None:
@@ -58,27 +84,111 @@ def _session_path(session_id: str) -> Path:
     return MONITOR_DIR / f"{session_id}.json"
 
 
-def write_session(state: SessionState) -> None:
+def _lock_path(session_id: str) -> Path:
+    return MONITOR_DIR / f"{session_id}.lock"
+
+
+@contextmanager
+def session_lock(session_id: str) -> Iterator[None]:
+    """Hold an exclusive flock on the session's lock file.
+
+    Hook processes take this around read-modify-write of a session file so
+    concurrent events for one session are applied one after another.
+    """
+    _ensure_dir()
+    fd = os.open(_lock_path(session_id), os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _unlink_session_files(json_path: str) -> None:
+    """Remove a session file and its lock file, ignoring missing ones."""
+    for p in (json_path, json_path[: -len(".json")] + ".lock"):
+        try:
+            os.unlink(p)
+        except OSError:
+            pass
+
+
+def _remove_orphan_locks(entries: list[os.DirEntry], now_ts: float, max_age_hours: float) -> None:
+    """Remove lock files older than max_age_hours whose session file is gone.
+
+    remove_session() leaves the lock file in place: unlinking it while a
+    hook waits on it would let that hook and the next one each hold "the"
+    lock. By this age no hook for the ended session is still running.
+    """
+    sessions = {e.name for e in entries if e.name.endswith(".json")}
+    for entry in entries:
+        if not entry.name.endswith(".lock"):
+            continue
+        if entry.name[: -len(".lock")] + ".json" in sessions:
+            continue
+        try:
+            age = (now_ts - entry.stat(follow_symlinks=False).st_mtime) / 3600
+            if age > max_age_hours:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Atomically replace path with data (temp file + rename).
+
+    The temp name is derived from the target and our pid, so concurrent hook
+    processes never share one and no random name has to be generated.
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_session(
+    state: SessionState,
+    existing: dict | None = None,
+    raw_subagents: list[dict] | None = None,
+) -> None:
     """Atomically write session state to disk.
 
     Includes anti-regression: if a later hook (with a newer last_updated)
     already wrote to the file, skip this write to avoid async race conditions
     (e.g. PreToolUse overwriting Stop).
+
+    If the caller already parsed the session file, pass it as ``existing``
+    to avoid reading and decoding it a second time. Callers that read and
+    then write should hold session_lock() across both.
+
+    raw_subagents, if given, is written as the subagent list verbatim instead
+    of serializing state.subagents — hooks that don't change subagents pass
+    the list straight through from the existing file.
     """
     _ensure_dir()
     path = _session_path(state.session_id)
 
-    # Anti-regression: don't overwrite with a stale event
-    if path.exists():
+    if existing is None and path.exists():
         try:
-            existing = json.loads(path.read_text())
-            existing_ts = existing.get("last_updated", "")
-            if existing_ts > state.last_updated:
-                return
+            existing = json.loads(path.read_bytes())
         except (json.JSONDecodeError, OSError):
             pass
 
+    # Anti-regression: don't overwrite with a stale event
+    if isinstance(existing, dict):
+        if record_ts(existing, "last_updated") > state.last_updated_ts:
+            return
+
     data = {
+        "version": FORMAT_VERSION,
         "session_id": state.session_id,
         "cwd": state.cwd,
         "project": state.project,
@@ -87,39 +197,38 @@ def write_session(state: SessionState) -> None:
         "permission_mode": state.permission_mode,
         "model": state.model,
         "topic": state.topic,
+        "topic_scanned": state.topic_scanned,
         "last_prompt": state.last_prompt,
         "tool_count": state.tool_count,
         "started_at": state.started_at,
         "last_updated": state.last_updated,
-        "subagents": [
+        "started_at_ts": state.started_at_ts,
+        "last_updated_ts": state.last_updated_ts,
+        "last_prompt_ts": state.last_prompt_ts,
+        "subagents": raw_subagents if raw_subagents is not None else [
             {
                 "agent_id": sa.agent_id,
                 "agent_type": sa.agent_type,
                 "status": sa.status,
                 "last_updated": sa.last_updated,
+                "last_updated_ts": sa.last_updated_ts,
             }
             for sa in state.subagents
         ],
     }
-    # Atomic write: temp file + rename
-    fd, tmp_path = tempfile.mkstemp(dir=MONITOR_DIR, suffix=".tmp")
-    try:
-        with os.fdopen(fd, "w") as f:
-            json.dump(data, f)
-        os.replace(tmp_path, path)
-    except Exception:
-        try:
-            os.unlink(tmp_path)
-        except OSError:
-            pass
-        raise
+
+    write_bytes_atomic(path, json.dumps(data))
 
 
 def remove_session(session_id: str) -> None:
-    """Remove session state file."""
-    path = _session_path(session_id)
+    """Remove session state file.
+
+    Callers hold session_lock(), so a hook already past the lock can't write
+    the file back. The lock file itself is removed later by cleanup (see
+    _remove_orphan_locks).
+    """
     try:
-        path.unlink(missing_ok=True)
+        os.unlink(_session_path(session_id))
     except OSError:
         pass
 
@@ -128,11 +237,23 @@ def get_sessions() -> list[SessionState]:
     """Read all session state files, cleaning up zombies."""
     _ensure_dir()
     sessions: list[SessionState] = []
-    now = datetime.now(timezone.utc)
+    now_ts = time.time()
+
+    with os.scandir(MONITOR_DIR) as it:
+        entries = list(it)
+    _remove_orphan_locks(entries, now_ts, ZOMBIE_THRESHOLD_HOURS)
 
-    for path in MONITOR_DIR.glob("*.json"):
+    for entry in entries:
+        if not entry.name.endswith(".json"):
+            continue
+        # Cleanup zombies (by file mtime, so they are never parsed)
         try:
-            data = json.loads(path.read_text())
+            mtime = entry.stat(follow_symlinks=False).st_mtime
+            if (now_ts - mtime) / 3600 > ZOMBIE_THRESHOLD_HOURS:
+                _unlink_session_files(entry.path)
+                continue
+            with open(entry.path, "rb") as f:
+                data = json.loads(f.read())
         except (json.JSONDecodeError, OSError):
             continue
 
@@ -142,13 +263,14 @@ def get_sessions() -> list[SessionState]:
                 agent_type=sa.get("agent_type", ""),
                 status=sa.get("status", "running"),
                 last_updated=sa.get("last_updated", ""),
+                last_updated_ts=record_ts(sa, "last_updated"),
             )
             for sa in data.get("subagents", [])
             if isinstance(sa, dict)
         ]
 
         state = SessionState(
-            session_id=data.get("session_id", path.stem),
+            session_id=data.get("session_id", entry.name[: -len(".json")]),
             cwd=data.get("cwd", ""),
             project=data.get("project", ""),
             status=data.get("status", "STARTING"),
@@ -156,49 +278,47 @@ def get_sessions() -> list[SessionState]:
             permission_mode=data.get("permission_mode", ""),
             model=data.get("model", ""),
             topic=data.get("topic", ""),
+            topic_scanned=data.get("topic_scanned", False),
             last_prompt=data.get("last_prompt", ""),
             tool_count=data.get("tool_count", 0),
             started_at=data.get("started_at", ""),
             last_updated=data.get("last_updated", ""),
+            started_at_ts=record_ts(data, "started_at"),
+            # Notifications only bump the mtime (see hook._touch_session)
+            last_updated_ts=max(record_ts(data, "last_updated"), mtime),
+            last_prompt_ts=data.get("last_prompt_ts", 0.0),
             subagents=subagents,
         )
 
-        # Cleanup zombies
-        age = (now - state.last_updated_dt).total_seconds() / 3600
-        if age > ZOMBIE_THRESHOLD_HOURS:
-            try:
-                path.unlink()
-            except OSError:
-                pass
-            continue
-
         sessions.append(state)
 
     # Active sessions first, then sorted by last_updated descending
-    sessions.sort(key=lambda s: (not s.is_active, s.last_updated), reverse=False)
-    sessions.sort(key=lambda s: (not s.is_active, -s.last_updated_dt.timestamp()))
+    sessions.sort(key=lambda s: (not s.is_active, -s.last_updated_ts))
     return sessions
 
 
 def cleanup_old_sessions(max_age_hours: float = 1.0) -> int:
-    """Remove sessions older than max_age_hours. Returns count removed."""
+    """Remove sessions older than max_age_hours. Returns count removed.
+
+    Age is taken from the file's mtime, which is set by every write.
+    """
     _ensure_dir()
-    now = datetime.now(timezone.utc)
+    now_ts = time.time()
     removed = 0
 
-    for path in MONITOR_DIR.glob("*.json"):
+    with os.scandir(MONITOR_DIR) as it:
+        entries = list(it)
+    _remove_orphan_locks(entries, now_ts, max_age_hours)
+
+    for entry in entries:
+        if not entry.name.endswith(".json"):
+            continue
         try:
-            data = json.loads(path.read_text())
-            last = datetime.fromisoformat(data.get("last_updated", ""))
-            age = (now - last).total_seconds() / 3600
-            if age > max_age_hours:
-                path.unlink()
-                removed += 1
-        except (json.JSONDecodeError, OSError, ValueError):
-            try:
-                path.unlink()
-                removed += 1
-            except OSError:
-                pass
+            age = (now_ts - entry.stat(follow_symlinks=False).st_mtime) / 3600
+        except OSError:
+            continue
+        if age > max_age_hours:
+            _unlink_session_files(entry.path)
+            removed += 1
 
     return removed
@@ -2,13 +2,35 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import os
+import time
 
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.widgets import DataTable, Footer, Header
 
-from claude_monitor.state import cleanup_old_sessions, get_sessions
+from claude_monitor.state import MONITOR_DIR, _ensure_dir, cleanup_old_sessions, get_sessions
+
+try:
+    from watchdog.events import FileSystemEvent, FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional: fall back to polling
+    Observer = None
+
+# Without watchdog the session directory is re-read this often
+POLL_INTERVAL = 1.0
+# With watchdog, a full re-read still runs this often as a safety net
+# (missed events, zombie cleanup); Duration cells tick every second
+# without touching the disk.
+WATCH_FALLBACK_INTERVAL = 10.0
+# Coalesce bursts of file events (a hook writes temp file + rename)
+WATCH_DEBOUNCE = 0.05
+# Events that mean a session file changed. inotify also reports "opened" and
+# "closed_no_write", which our own reads trigger — reacting to those would
+# make every refresh schedule the next one.
+_WATCH_EVENT_TYPES = frozenset({"created", "modified", "moved", "deleted", "closed"})
+
+_DURATION_COLUMN = 6
 
 STATUS_DISPLAY = {
     "WAITING": ("WAITING", "green"),
@@ -34,31 +56,25 @@ MODE_SHORT = {
 }
 
 
-def _format_time(iso_str: str) -> str:
-    """Format ISO timestamp to HH:MM:SS."""
-    try:
-        dt = datetime.fromisoformat(iso_str)
-        local = dt.astimezone()
-        return local.strftime("%H:%M:%S")
-    except (ValueError, TypeError):
+def _format_time(ts: float) -> str:
+    """Format epoch timestamp to local HH:MM:SS."""
+    if not ts:
         return "-"
+    return time.strftime("%H:%M:%S", time.localtime(ts))
 
 
-def _format_duration(started_at: str) -> str:
-    """Format duration since started_at as HH:MM:SS or MM:SS."""
-    try:
-        start = datetime.fromisoformat(started_at)
-        delta = datetime.now(timezone.utc) - start
-        total_secs = int(delta.total_seconds())
-        if total_secs < 0:
-            return "-"
-        hours, remainder = divmod(total_secs, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        if hours > 0:
-            return f"{hours}:{minutes:02d}:{seconds:02d}"
-        return f"{minutes}:{seconds:02d}"
-    except (ValueError, TypeError):
+def _format_duration(started_ts: float) -> str:
+    """Format duration since started_ts as HH:MM:SS or MM:SS."""
+    if not started_ts:
         return "-"
+    total_secs = int(time.time() - started_ts)
+    if total_secs < 0:
+        return "-"
+    hours, remainder = divmod(total_secs, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
 
 
 def _short_model(model: str) -> str:
@@ -90,6 +106,26 @@ def _status_text(status: str) -> str:
     return label
 
 
+if Observer is not None:
+
+    class _SessionDirHandler(FileSystemEventHandler):
+        """Forward changes to session .json files to the app's event loop."""
+
+        def __init__(self, app: ClaudeMonitorApp) -> None:
+            self._app = app
+
+        def on_any_event(self, event: FileSystemEvent) -> None:
+            if event.event_type not in _WATCH_EVENT_TYPES:
+                return
+            paths = (os.fsdecode(event.src_path), os.fsdecode(getattr(event, "dest_path", "")))
+            if not any(p.endswith(".json") for p in paths):
+                return
+            try:
+                self._app.call_from_thread(self._app.schedule_refresh)
+            except RuntimeError:
+                pass  # app is shutting down
+
+
 class ClaudeMonitorApp(App):
     """TUI application for monitoring Claude Code sessions."""
 
@@ -114,20 +150,63 @@ class ClaudeMonitorApp(App):
 
     def on_mount(self) -> None:
         table = self.query_one(DataTable)
-        table.add_columns(
+        self._columns = table.add_columns(
             "Project", "Status", "Tool", "Model", "Mode",
             "Tools", "Duration", "Updated", "Topic",
         )
         table.cursor_type = "row"
+        # Rows currently shown, in display order: row key -> cells
+        self._rows: dict[str, tuple[str, ...]] = {}
+        # Session row key -> started_at_ts, for ticking Duration between reads
+        self._started: dict[str, float] = {}
+        self._refresh_pending = False
+        self._observer = None
         self._refresh_table()
-        self.set_interval(1.0, self._refresh_table)
 
-    def _refresh_table(self) -> None:
+        if Observer is not None:
+            _ensure_dir()
+            self._observer = Observer()
+            self._observer.schedule(_SessionDirHandler(self), str(MONITOR_DIR))
+            self._observer.daemon = True
+            self._observer.start()
+            self.set_interval(WATCH_FALLBACK_INTERVAL, self._refresh_table)
+            self.set_interval(1.0, self._update_durations)
+        else:
+            self.set_interval(POLL_INTERVAL, self._refresh_table)
+
+    def on_unmount(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=1.0)
+
+    def schedule_refresh(self) -> None:
+        """Refresh shortly, folding any further file events into the same refresh."""
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.set_timer(WATCH_DEBOUNCE, self._debounced_refresh)
+
+    def _debounced_refresh(self) -> None:
+        self._refresh_pending = False
+        self._refresh_table()
+
+    def _update_durations(self) -> None:
+        """Advance the Duration cells from cached start times, without reading files."""
         table = self.query_one(DataTable)
-        table.clear()
+        column = self._columns[_DURATION_COLUMN]
+        for key, started_ts in self._started.items():
+            cells = self._rows[key]
+            value = _format_duration(started_ts)
+            if value != cells[_DURATION_COLUMN]:
+                table.update_cell(key, column, value, update_width=True)
+                self._rows[key] = (
+                    *cells[:_DURATION_COLUMN], value, *cells[_DURATION_COLUMN + 1:]
+                )
 
-        sessions = get_sessions()
-        for s in sessions:
+    def _build_rows(self) -> dict[str, tuple[str, ...]]:
+        """Compute the table contents, keyed by session id (and subagent index)."""
+        rows: dict[str, tuple[str, ...]] = {}
+        self._started = {}
+        for s in get_sessions():
             status_label = _status_text(s.status)
             _, color = STATUS_DISPLAY.get(s.status, (s.status, "white"))
 
@@ -136,15 +215,16 @@ class ClaudeMonitorApp(App):
             model = _short_model(s.model)
             mode = _short_mode(s.permission_mode)
             tools = str(s.tool_count) if s.tool_count else "-"
-            duration = _format_duration(s.started_at)
-            updated = _format_time(s.last_updated)
+            duration = _format_duration(s.started_at_ts)
+            updated = _format_time(s.last_updated_ts)
             project = s.project or s.cwd or "-"
             topic = _truncate(s.topic, 50) if s.topic else _truncate(s.last_prompt, 50)
 
-            table.add_row(
+            rows[s.session_id] = (
                 project, styled_status, tool, model, mode,
                 tools, duration, updated, topic,
             )
+            self._started[s.session_id] = s.started_at_ts
 
             # Render subagents as indented child rows
             for i, sa in enumerate(s.subagents):
@@ -152,12 +232,36 @@ class ClaudeMonitorApp(App):
                 prefix = "  \u2514\u2500 " if is_last else "  \u251c\u2500 "
                 sa_name = f"{prefix}{sa.agent_type or sa.agent_id[:12]}"
                 sa_status = f"[dim]{sa.status}[/]"
-                sa_updated = _format_time(sa.last_updated)
+                sa_updated = _format_time(sa.last_updated_ts)
 
-                table.add_row(
+                rows[f"{s.session_id}/{i}"] = (
                     sa_name, sa_status, "-", "", "",
                     "", "", sa_updated, "",
                 )
+        return rows
+
+    def _refresh_table(self) -> None:
+        """Update the table, touching only cells that changed.
+
+        The table is rebuilt only when rows appear, disappear or reorder;
+        otherwise (the common case) just the changed cells — usually
+        Duration — are updated.
+        """
+        table = self.query_one(DataTable)
+        rows = self._build_rows()
+
+        if list(rows) != list(self._rows):
+            table.clear()
+            for key, cells in rows.items():
+                table.add_row(*cells, key=key)
+        else:
+            for key, cells in rows.items():
+                old = self._rows[key]
+                for column, value, prev in zip(self._columns, cells, old):
+                    if value != prev:
+                        table.update_cell(key, column, value, update_width=True)
+
+        self._rows = rows
 
     def action_refresh(self) -> None:
         self._refresh_table()
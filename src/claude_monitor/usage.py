@@ -1,21 +1,69 @@
-"""Fetch Claude Code usage data and write to monitor directory."""
+"""Fetch Claude Code usage data and write to monitor directory.
+
+Usage is fetched either directly by the usage hook (one request per
+process) or by a long-running daemon that keeps an HTTPS connection open;
+the hook then only pings the daemon over a Unix socket.
+"""
 
 from __future__ import annotations
 
-import json
 import os
+import socket
 import subprocess
-import tempfile
+import time
 from pathlib import Path
-from urllib.request import Request, urlopen
+
+from claude_monitor import _json as json
+from claude_monitor.state import write_bytes_atomic
 
 MONITOR_DIR = Path.home() / ".claude" / "monitor"
 USAGE_FILE = MONITOR_DIR / "usage.json"
-API_URL = "https://api.anthropic.com/api/oauth/usage"
+API_HOST = "api.anthropic.com"
+API_PATH = "/api/oauth/usage"
+API_URL = f"https://{API_HOST}{API_PATH}"
+SOCKET_PATH = MONITOR_DIR / "usage.sock"
+FETCH_COMMAND = b"FETCH\n"
 
+# Each usage hook is a fresh process, so the token is cached on disk (0600)
+# to avoid a Keychain lookup per event.
+TOKEN_CACHE_FILE = MONITOR_DIR / ".token_cache"
+# Cache lifetime when the credentials carry no expiry
+TOKEN_CACHE_TTL = 300
+# Go back to the Keychain this long before the token expires
+TOKEN_EXPIRY_MARGIN = 60
 
-def _read_oauth_token() -> str | None:
-    """Read OAuth access token from macOS Keychain."""
+
+def _read_cached_token() -> str | None:
+    """Return the cached token unless it is missing or about to expire."""
+    try:
+        cached = json.loads(TOKEN_CACHE_FILE.read_bytes())
+    except (json.JSONDecodeError, OSError):
+        return None
+    if not isinstance(cached, dict):
+        return None
+    token = cached.get("token")
+    expires_at = cached.get("expires_at")
+    if not token or not isinstance(expires_at, (int, float)):
+        return None
+    if time.time() >= expires_at - TOKEN_EXPIRY_MARGIN:
+        return None
+    return token
+
+
+def _write_cached_token(token: str, expires_at: float) -> None:
+    MONITOR_DIR.mkdir(parents=True, exist_ok=True)
+    write_bytes_atomic(TOKEN_CACHE_FILE, json.dumps({"token": token, "expires_at": expires_at}))
+
+
+def _clear_cached_token() -> None:
+    try:
+        os.unlink(TOKEN_CACHE_FILE)
+    except OSError:
+        pass
+
+
+def _read_keychain_token() -> tuple[str, float] | None:
+    """Read OAuth access token and its expiry (epoch seconds) from macOS Keychain."""
     try:
         result = subprocess.run(
             ["security", "find-generic-password", "-s", "Claude Code-credentials", "-w"],
@@ -26,40 +74,201 @@ def _read_oauth_token() -> str | None:
         if result.returncode != 0:
             return None
         creds = json.loads(result.stdout.strip())
-        return creds.get("claudeAiOauth", {}).get("accessToken")
     except (subprocess.TimeoutExpired, json.JSONDecodeError, OSError):
         return None
+    oauth = creds.get("claudeAiOauth", {})
+    token = oauth.get("accessToken")
+    if not token:
+        return None
+    # expiresAt is in milliseconds
+    expires_at_ms = oauth.get("expiresAt")
+    if isinstance(expires_at_ms, (int, float)):
+        expires_at = expires_at_ms / 1000
+    else:
+        expires_at = time.time() + TOKEN_CACHE_TTL
+    return token, expires_at
 
 
-def fetch_and_write_usage() -> None:
-    """Fetch usage data from Claude API and write to usage.json atomically."""
-    token = _read_oauth_token()
-    if not token:
-        return
+def _read_oauth_token() -> str | None:
+    """Return the OAuth access token, from the disk cache or the Keychain."""
+    token = _read_cached_token()
+    if token:
+        return token
+    found = _read_keychain_token()
+    if found is None:
+        return None
+    token, expires_at = found
+    try:
+        _write_cached_token(token, expires_at)
+    except OSError:
+        pass
+    return token
+
 
-    req = Request(API_URL, headers={
+def _api_headers(token: str) -> dict[str, str]:
+    return {
         "Accept": "application/json",
         "Content-Type": "application/json",
         "Authorization": f"Bearer {token}",
         "anthropic-beta": "oauth-2025-04-20",
-    })
+    }
 
-    with urlopen(req, timeout=10) as resp:
-        data = resp.read()
 
+def _write_usage(data: bytes) -> None:
     # Validate JSON
     json.loads(data)
 
-    # Atomic write
     MONITOR_DIR.mkdir(parents=True, exist_ok=True)
-    fd, tmp_path = tempfile.mkstemp(dir=MONITOR_DIR, suffix=".tmp")
+    write_bytes_atomic(USAGE_FILE, data)
+
+
+def fetch_and_write_usage() -> None:
+    """Fetch usage data from Claude API and write to usage.json atomically."""
+    # Imported here: the usage hook usually just pings the daemon
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    token = _read_oauth_token()
+    if not token:
+        return
+
+    req = Request(API_URL, headers=_api_headers(token))
+
+    try:
+        with urlopen(req, timeout=10) as resp:
+            data = resp.read()
+    except HTTPError as e:
+        # Token revoked or refreshed early — next run re-reads the Keychain
+        if e.code == 401:
+            _clear_cached_token()
+        raise
+
+    _write_usage(data)
+
+
+def _connect_daemon() -> socket.socket | None:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(0.5)
     try:
-        with os.fdopen(fd, "wb") as f:
-            f.write(data)
-        os.replace(tmp_path, USAGE_FILE)
-    except Exception:
+        sock.connect(str(SOCKET_PATH))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def request_fetch() -> bool:
+    """Ask a running usage daemon to fetch. Returns False if none is listening."""
+    sock = _connect_daemon()
+    if sock is None:
+        return False
+    with sock:
         try:
-            os.unlink(tmp_path)
+            sock.sendall(FETCH_COMMAND)
         except OSError:
+            return False
+    return True
+
+
+class UsageDaemon:
+    """Fetch usage on request from a Unix socket, reusing one HTTPS connection.
+
+    Saves the TCP + TLS handshake the one-shot fetch pays on every hook.
+    Clients disconnect right after sending, so hooks never wait for the
+    fetch; requests that queue up while a fetch runs share one follow-up
+    fetch.
+    """
+
+    def __init__(self) -> None:
+        self._conn = None
+
+    def fetch(self) -> None:
+        token = _read_oauth_token()
+        if not token:
+            return
+        import http.client
+
+        try:
+            status, data = self._get(token)
+        except (http.client.HTTPException, OSError):
+            # The kept-alive connection may have been closed by the server
+            status, data = self._get(token)
+        if status == 401:
+            _clear_cached_token()
+            return
+        if status != 200:
+            return
+        _write_usage(data)
+
+    def _get(self, token: str) -> tuple[int, bytes]:
+        import http.client
+
+        if self._conn is None:
+            self._conn = http.client.HTTPSConnection(API_HOST, timeout=10)
+        try:
+            self._conn.request("GET", API_PATH, headers=_api_headers(token))
+            resp = self._conn.getresponse()
+            return resp.status, resp.read()
+        except (http.client.HTTPException, OSError):
+            self._conn.close()
+            self._conn = None
+            raise
+
+    @staticmethod
+    def _read_command(client: socket.socket) -> bytes:
+        with client:
+            client.settimeout(1.0)
+            try:
+                return client.recv(64)
+            except OSError:
+                return b""
+
+    def _wait_for_fetch_request(self, server: socket.socket) -> None:
+        """Block until a FETCH arrives, then take every other queued request with it."""
+        while True:
+            server.setblocking(True)
+            wanted = self._read_command(server.accept()[0]) == FETCH_COMMAND
+            server.setblocking(False)
+            while True:
+                try:
+                    client, _ = server.accept()
+                except BlockingIOError:
+                    break
+                wanted = self._read_command(client) == FETCH_COMMAND or wanted
+            if wanted:
+                return
+
+    def serve_forever(self) -> None:
+        """Listen on SOCKET_PATH until interrupted.
+
+        Raises RuntimeError if another daemon is already listening.
+        """
+        probe = _connect_daemon()
+        if probe is not None:
+            probe.close()
+            raise RuntimeError(f"usage daemon already listening on {SOCKET_PATH}")
+        MONITOR_DIR.mkdir(parents=True, exist_ok=True)
+        try:
+            os.unlink(SOCKET_PATH)
+        except FileNotFoundError:
             pass
-        raise
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(str(SOCKET_PATH))
+            os.chmod(SOCKET_PATH, 0o600)
+            server.listen()
+            while True:
+                self._wait_for_fetch_request(server)
+                try:
+                    self.fetch()
+                except Exception:
+                    pass
+        finally:
+            server.close()
+            if self._conn is not None:
+                self._conn.close()
+            try:
+                os.unlink(SOCKET_PATH)
+            except OSError:
+                pass